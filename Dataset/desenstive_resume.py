@@ -4,18 +4,27 @@
 简历数据集脱敏处理工具
 """
 
+import numpy as np
 import pandas as pd
 import re
+import csv
 import json
-from collections import defaultdict
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import hashlib
+import heapq
+import logging
 from tqdm.auto import tqdm
-from typing import List, Dict, Any, Tuple, Set, Optional
+from typing import List, Dict, Any, Tuple, Set, Optional, Callable, Union
 import argparse
 
+# 错误信息(含堆栈)通过logging输出，由调用方配置处理器和级别
+log = logging.getLogger(__name__)
+
 # 尝试导入presidio库，如果不可用则提供警告
 try:
-    from presidio_analyzer import AnalyzerEngine, PatternRecognizer, Pattern, RecognizerResult
+    from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine, PatternRecognizer, Pattern, RecognizerResult
     from presidio_anonymizer import AnonymizerEngine
     from presidio_anonymizer.entities import OperatorConfig
 
@@ -26,7 +35,34 @@ except ImportError:
     print("安装spacy后，还需要: python -m spacy download en_core_web_lg")
     PRESIDIO_AVAILABLE = False
 
-tqdm.pandas()
+# 可选: pyarrow用于多线程CSV读取、Arrow字符串列和Parquet输出
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# 可选: orjson(C实现)用于逐行写出和合并敏感信息NDJSON，不可用时回退到json
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 实体文本列的字符串类型：优先使用Arrow存储
+_STRING_DTYPE = "string[pyarrow]" if PYARROW_AVAILABLE else "string"
+
+# 可选: 使用hyperscan一次扫描所有模式，预筛出可能命中的类型
+try:
+    import hyperscan
+
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
 
 # 定义可用的敏感信息类型
 SENSITIVE_INFO_TYPES = {
@@ -51,6 +87,260 @@ SENSITIVE_INFO_TYPES = {
 }
 
 
+# 月份起止日期(教育经历和工作经历共用), 例如 "September 2010 to June 2014"
+_MONTH_NAME_RE_STR = r'(?:(?:Jan|Febr)uary|Ma(?:rch|y)|A(?:pril|ugust)|Ju(?:ne|ly)|(?:Septem|Octo|Novem|Decem)ber)'
+_MONTH_RANGE_RE_STR = _MONTH_NAME_RE_STR + r'\s+\d{4}\s+to\s+' + _MONTH_NAME_RE_STR + r'\s+\d{4}'
+
+# 容易产生回溯的模式使用有界重复，保证在不匹配的长文本上扫描代价可控
+_PHONE_LABELLED_RE_STR = r'(?:Phone|Tel|Mobile|Contact)(?:\s*(?:Number|No|#|\:))?\s*[:：]?\s*(\+?[\d\s\(\)\-\.]{7,30})'
+_ADDRESS_STREET_RE_STR = r'\b\d+\s+[A-Za-z0-9\s,]{1,80}?(?:Street|Avenue|Road|Blvd|Drive|Lane|Place|Way|Apt|Suite|St|Rd|Dr|Ave)\b'
+_ADDRESS_UNIT_RE_STR = r'\b\d+/[A-Za-z0-9],?\s+[A-Za-z0-9\s,]{1,80},\s+[A-Za-z\s]{1,40},\s+[A-Za-z\s]{1,40}\b'
+_COMPANY_WORKED_RE_STR = r'[Ww]orked\s+(?:at|for|with)\s+([A-Z][A-Za-z0-9\s&,.]{1,80}(?:Inc|LLC|Ltd|Limited|Corp|Corporation|Co|Company))'
+_SCHOOL_NAME_RE_STR = r'(?:[A-Z][a-z]+\s+){1,6}(?:University|College|Institute|School)'
+
+# 预编译的正则表达式（模块导入时编译一次，避免每条简历重复解析）
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+_NAME_RE = re.compile(r'\b([A-Z][a-z]+\s+[A-Z][a-z]+)\b')
+
+_MONTH_RANGE_RE = re.compile(_MONTH_RANGE_RE_STR)
+
+# 额外敏感信息的正则：每个类别各自search，只取第一个匹配
+_DOB_GENDER_RE = re.compile(r'Date\s+of\s+Birth\s*\(\s*Gender\s*\)\s*:\s*(\d{4}-\d{2}-\d{2})\s*\(\s*([MF])\s*\)')
+_FAMILY_RE = re.compile(r'(?:Father|Mother)(?:\'|\')?s\s+Name\s*[:：]\s*([^\n]+)')
+_MARITAL_RE = re.compile(r'Marital\s+Status\s*[:：]\s*([^\n,]+)')
+_NATIONALITY_RE = re.compile(r'Nationality\s*[:：]\s*([^\n,]+)')
+_PHOTO_RE = re.compile(r'(?:Photo|Picture|Image)\s*[:：]?\s*([^\n]+\.(?:jpg|jpeg|png|gif))')
+
+
+def _replace_group(token: str) -> Callable[[str, int, int], str]:
+    """生成只替换匹配片段中捕获组内容的替换函数(按捕获组位置替换)"""
+    return lambda segment, start, end: segment[:start] + token + segment[end:]
+
+
+# 基本脱敏使用的模式表: 类型 -> [(预编译模式, 替换值或替换函数)]
+_PATTERNS_BY_TYPE: Dict[str, List[Tuple[re.Pattern, Union[str, Callable[[str, int, int], str]]]]] = {
+    # 个人姓名
+    "PERSON_NAME": [
+        (_NAME_RE, "<NAME>"),
+        (re.compile(r"Father(?:'|')?s Name\s*[:：]\s*([^\n,]+)"), "Father's Name: <NAME>"),
+        (re.compile(r"Mother(?:'|')?s Name\s*[:：]\s*([^\n,]+)"), "Mother's Name: <NAME>"),
+    ],
+    # 电子邮件地址
+    "EMAIL_ADDRESS": [
+        (_EMAIL_RE, "<EMAIL>"),
+    ],
+    # 电话号码
+    "PHONE_NUMBER": [
+        (re.compile(r'\b(?:\+\d{1,3}[-.\s]?)?(?:\(?\d{3}\)?[-.\s]?){1,2}\d{3,4}[-.\s]?\d{3,4}\b'), "<PHONE>"),
+        (re.compile(_PHONE_LABELLED_RE_STR), _replace_group("<PHONE>")),
+    ],
+    # 社交媒体链接
+    "SOCIAL_MEDIA": [
+        (re.compile(r'(?:linkedin\.com/in/[a-zA-Z0-9_-]+)'), "<LINKEDIN>"),
+        (re.compile(r'(?:github\.com/[a-zA-Z0-9_-]+)'), "<GITHUB>"),
+        (re.compile(r'(?:twitter\.com/[a-zA-Z0-9_-]+)'), "<TWITTER>"),
+        (re.compile(r'(?:facebook\.com/[a-zA-Z0-9_.-]+)'), "<FACEBOOK>"),
+    ],
+    # 出生日期
+    "DATE_OF_BIRTH": [
+        (re.compile(r'(?:Date\s+of\s+Birth|DOB|Birth\s+Date)(?:\s*(?:\:|\())?\s*(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})'),
+         _replace_group("<DOB>")),
+        (re.compile(r'(?:Date\s+of\s+Birth|DOB|Birth\s+Date)(?:\s*(?:\:|\())?\s*(\d{4}[-/\.]\d{1,2}[-/\.]\d{1,2})'),
+         _replace_group("<DOB>")),
+        (re.compile(r'(?:Date\s+of\s+Birth|DOB|Birth\s+Date)(?:\s*(?:\:|\())?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})'),
+         _replace_group("<DOB>")),
+    ],
+    # 性别信息
+    "GENDER": [
+        (re.compile(r'(?:Gender|Sex)\s*[:：]\s*([^\n,]+)'), _replace_group("<GENDER>")),
+        (re.compile(r'\((?:M|F|Male|Female|男|女)\)'), "(<GENDER>)"),
+        (re.compile(r'Gender\s*[:-]?\s*(Male|Female|M|F|男|女)'), _replace_group("<GENDER>")),
+    ],
+    # 婚姻状况
+    "MARITAL_STATUS": [
+        (re.compile(r'(?:Marital\s+Status|Marriage\s+Status)\s*[:：]\s*([^\n,]+)'), _replace_group("<MARITAL_STATUS>")),
+    ],
+    # 地址信息
+    "ADDRESS": [
+        (re.compile(_ADDRESS_STREET_RE_STR), "<ADDRESS>"),
+        (re.compile(r'(?:Address|Location)\s*[:：]\s*([^\n]+)'), _replace_group("<ADDRESS>")),
+        (re.compile(_ADDRESS_UNIT_RE_STR), "<ADDRESS>"),
+    ],
+    # 教育日期
+    "EDUCATION_DATES": [
+        (_MONTH_RANGE_RE, "<EDUCATION_DATES>"),
+        (re.compile(r'\b(?:19|20)\d{2}\s+to\s+(?:19|20)\d{2}\b'), "<EDUCATION_DATES>"),
+        (re.compile(r'\b(?:19|20)\d{2}\s*[-–]\s*(?:19|20)\d{2}\b'), "<EDUCATION_DATES>"),
+        (re.compile(r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4}\b'), "<DATE>"),
+    ],
+    # 工作日期
+    "WORK_DATES": [
+        (_MONTH_RANGE_RE, "<WORK_DATES>"),
+        (re.compile(r'\b(?:19|20)\d{2}\s+to\s+(?:19|20)\d{2}|[Pp]resent\b'), "<WORK_DATES>"),
+        (re.compile(r'\b(?:19|20)\d{2}\s*[-–]\s*(?:19|20)\d{2}|[Pp]resent\b'), "<WORK_DATES>"),
+    ],
+    # 公司名称
+    "COMPANY_NAME": [
+        (re.compile(r'[Cc]ompany\s*[-:]?\s*([^\n,]+)'), _replace_group("<COMPANY>")),
+        (re.compile(r'[Cc]ompany\s+[Nn]ame\s*[:：]\s*([^\n,]+)'), _replace_group("<COMPANY>")),
+        (re.compile(r'[Ee]mployer\s*[:：]\s*([^\n,]+)'), _replace_group("<COMPANY>")),
+        (re.compile(_COMPANY_WORKED_RE_STR), _replace_group("<COMPANY>")),
+    ],
+    # 学校名称
+    "SCHOOL_NAME": [
+        (re.compile(r'(?:University|College|Institute|School)\s+of\s+([^\n,]+)'), _replace_group("<SCHOOL>")),
+        (re.compile(r'(?:University|College|Institute|School)\s*[:：]\s*([^\n,]+)'), _replace_group("<SCHOOL>")),
+        (re.compile(_SCHOOL_NAME_RE_STR), "<SCHOOL>"),
+    ],
+    # 年龄信息
+    "AGE": [
+        (re.compile(r'(?:Age|Years)\s*[:：]\s*(\d{1,2})'), _replace_group("<AGE>")),
+        (re.compile(r'(\d{1,2})\s+[Yy]ears\s+[Oo]ld'), _replace_group("<AGE>")),
+        (re.compile(r'[Aa]ge[:：]?\s*(\d{1,2})'), _replace_group("<AGE>")),
+    ],
+}
+
+
+# 各类型模式命中的必要字面量(区分大小写)：文本中一个都不含时该类型的所有模式都不可能匹配
+# 未列出的类型(如姓名、电话号码)没有可靠的字面量，始终参与匹配
+_REQUIRED_LITERALS: Dict[str, Tuple[str, ...]] = {
+    "EMAIL_ADDRESS": ("@",),
+    "SOCIAL_MEDIA": ("linkedin.com", "github.com", "twitter.com", "facebook.com"),
+    "DATE_OF_BIRTH": ("Birth", "DOB"),
+    "GENDER": ("Gender", "Sex", "("),
+    "MARITAL_STATUS": ("Marital", "Marriage"),
+    "ADDRESS": ("Address", "Location", "/", "St", "Ave", "Road", "Rd", "Blvd", "Dr", "Lane", "Place", "Way", "Apt",
+                "Suite"),
+    "EDUCATION_DATES": ("to", "-", "–", "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov",
+                        "Dec"),
+    "WORK_DATES": ("to", "-", "–", "resent"),
+    "COMPANY_NAME": ("ompany", "mployer", "orked"),
+    "SCHOOL_NAME": ("University", "College", "Institute", "School"),
+    "AGE": ("ge", "ears"),
+}
+
+
+@lru_cache(maxsize=256)
+def _active_patterns(types_key: frozenset) -> Tuple[Tuple[re.Pattern, str, int, Any], ...]:
+    """
+    按_PATTERNS_BY_TYPE中的顺序(即匹配优先级)列出选定类型的所有模式
+
+    Args:
+        types_key: 敏感信息类型集合
+
+    Returns:
+        tuple: 每项为 (预编译模式, 小写类型, 实体所在组号(有捕获组时取第一个捕获组，否则为整个匹配), 替换值)
+    """
+    return tuple(
+        (pattern, entity_type.lower(), 1 if pattern.groups else 0, replacement)
+        for entity_type, patterns in _PATTERNS_BY_TYPE.items() if entity_type in types_key
+        for pattern, replacement in patterns
+    )
+
+
+@lru_cache(maxsize=None)
+def _hyperscan_prefilter():
+    """
+    将所有模式编译为一个hyperscan多模式数据库，用于一次扫描判断哪些类型可能命中
+    使用PREFILTER模式：报告的是真实匹配的超集，不会漏掉任何能匹配的类型
+    编译耗时数秒，首次扫描时才构建，之后复用
+
+    Returns:
+        tuple: (hyperscan数据库(不可用时为None), 模式编号 -> 类型, 始终参与匹配的类型集合)
+    """
+    if not HYPERSCAN_AVAILABLE:
+        return None, [], frozenset()
+
+    # 与字面量预筛一致：没有可靠字面量的类型(姓名、电话号码)几乎每份简历都会命中，不放入数据库，始终参与匹配
+    always_types = frozenset(entity_type for entity_type in _PATTERNS_BY_TYPE if entity_type not in _REQUIRED_LITERALS)
+
+    # 与Python str正则保持一致：按UTF-8扫描，\s、\d、\b使用Unicode语义
+    flags = (hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP
+             | hyperscan.HS_FLAG_PREFILTER | hyperscan.HS_FLAG_SINGLEMATCH)
+
+    def compile_database(expressions):
+        database = hyperscan.Database()
+        database.compile(expressions=expressions, ids=list(range(len(expressions))),
+                         flags=[flags] * len(expressions))
+        return database
+
+    entries = [(pattern.pattern.encode(), entity_type)
+               for entity_type, patterns in _PATTERNS_BY_TYPE.items() if entity_type not in always_types
+               for pattern, _ in patterns]
+    try:
+        return compile_database([e for e, _ in entries]), [t for _, t in entries], always_types
+    except hyperscan.error:
+        pass
+
+    # 整体编译失败时才逐个探测，剔除无法编译的模式，其所属类型始终参与匹配
+    supported, unsupported = [], set()
+    for expression, entity_type in entries:
+        try:
+            compile_database([expression])
+        except hyperscan.error:
+            unsupported.add(entity_type)
+        else:
+            supported.append((expression, entity_type))
+
+    if not supported:
+        return None, [], frozenset()
+    return compile_database([e for e, _ in supported]), [t for _, t in supported], always_types | unsupported
+
+
+# hyperscan的Unicode字符表比Python旧，且\s不含\x1c-\x1f：逐字符核对这几类的归属是否与Python re一致
+_CHAR_CLASS_PROBES = (re.compile(r'\s'), re.compile(r'\d'), re.compile(r'\w'))
+
+
+@lru_cache(maxsize=None)
+def _hyperscan_class_probe():
+    """编译只含\\s、\\d、\\w三个模式的hyperscan数据库，模式编号与_CHAR_CLASS_PROBES的位置对应"""
+    database = hyperscan.Database()
+    database.compile(expressions=[probe.pattern.encode() for probe in _CHAR_CLASS_PROBES],
+                     ids=list(range(len(_CHAR_CLASS_PROBES))),
+                     flags=[hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_UCP] * len(_CHAR_CLASS_PROBES))
+    return database
+
+
+@lru_cache(maxsize=None)
+def _hyperscan_char_consistent(char: str) -> bool:
+    """判断单个字符在hyperscan与Python re中是否同样属于(或不属于)\\s、\\d、\\w"""
+    hits = set()
+    _hyperscan_class_probe().scan(char.encode('utf-8'),
+                                  match_event_handler=lambda pattern_id, *_: hits.add(pattern_id))
+    return hits == {i for i, probe in enumerate(_CHAR_CLASS_PROBES) if probe.match(char)}
+
+
+def _hyperscan_hit_types(text: str) -> Optional[Set[str]]:
+    """
+    用hyperscan扫描一次文本，返回可能命中的类型集合
+
+    Args:
+        text: 文本内容
+
+    Returns:
+        set: 可能命中的类型；hyperscan不可用、文本无法编码或含有两者字符类不一致的字符时返回None
+    """
+    database, id_types, always_types = _hyperscan_prefilter()
+    if database is None:
+        return None
+    try:
+        data = text.encode('utf-8')
+    except UnicodeEncodeError:
+        return None
+    # 否则hyperscan可能漏报Python re能匹配的类型
+    if not all(map(_hyperscan_char_consistent, set(text))):
+        return None
+
+    hits = set(always_types)
+    add = hits.add
+
+    def on_match(pattern_id, start, end, flags, context):
+        add(id_types[pattern_id])
+
+    database.scan(data, match_event_handler=on_match)
+    return hits
+
+
 # 配置简历数据集的识别规则
 def configure_resume_recognizers(selected_types: Optional[List[str]] = None):
     """
@@ -69,8 +359,21 @@ def configure_resume_recognizers(selected_types: Optional[List[str]] = None):
     if selected_types is None:
         selected_types = list(SENSITIVE_INFO_TYPES.keys())
 
+    return list(_cached_recognizers(frozenset(selected_types)))
+
+
+@lru_cache(maxsize=8)
+def _cached_recognizers(selected_types: frozenset) -> Tuple:
+    """按类型集合构建识别器并缓存，同一进程内重复初始化引擎时不再重新构建和编译"""
     recognizers = []
 
+    # 教育日期和工作日期共用同一个月份起止模式，只编译一次
+    month_range_pattern = Pattern(
+        name="month_range_date_pattern",
+        regex=_MONTH_RANGE_RE_STR,
+        score=0.75
+    )
+
     # 1. 个人姓名识别器
     if "PERSON_NAME" in selected_types:
         name_patterns = [
@@ -121,7 +424,7 @@ def configure_resume_recognizers(selected_types: Optional[List[str]] = None):
             ),
             Pattern(
                 name="resume_phone_pattern2",
-                regex=r'(?:Phone|Tel|Mobile|Contact)(?:\s*(?:Number|No|#|\:))?\s*[:：]?\s*(\+?[\d\s\(\)\-\.]{7,})',
+                regex=_PHONE_LABELLED_RE_STR,
                 score=0.85
             )
         ]
@@ -236,7 +539,7 @@ def configure_resume_recognizers(selected_types: Optional[List[str]] = None):
         address_patterns = [
             Pattern(
                 name="address_pattern1",
-                regex=r'\b\d+\s+[A-Za-z0-9\s,]+(?:Street|Avenue|Road|Blvd|Drive|Lane|Place|Way|Apt|Suite|St|Rd|Dr|Ave)\b',
+                regex=_ADDRESS_STREET_RE_STR,
                 score=0.7
             ),
             Pattern(
@@ -246,7 +549,7 @@ def configure_resume_recognizers(selected_types: Optional[List[str]] = None):
             ),
             Pattern(
                 name="address_pattern3",
-                regex=r'\b\d+/[A-Za-z0-9],?\s+[A-Za-z0-9\s,]+,\s+[A-Za-z\s]+,\s+[A-Za-z\s]+\b',
+                regex=_ADDRESS_UNIT_RE_STR,
                 score=0.7
             )
         ]
@@ -260,11 +563,7 @@ def configure_resume_recognizers(selected_types: Optional[List[str]] = None):
     # 9. 教育日期识别器
     if "EDUCATION_DATES" in selected_types:
         education_date_patterns = [
-            Pattern(
-                name="education_date_pattern1",
-                regex=r'(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}\s+to\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}',
-                score=0.75
-            ),
+            month_range_pattern,
             Pattern(
                 name="education_date_pattern2",
                 regex=r'\b(?:19|20)\d{2}\s+to\s+(?:19|20)\d{2}\b',
@@ -291,11 +590,7 @@ def configure_resume_recognizers(selected_types: Optional[List[str]] = None):
     # 10. 工作日期识别器
     if "WORK_DATES" in selected_types:
         work_date_patterns = [
-            Pattern(
-                name="work_date_pattern1",
-                regex=r'(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}\s+to\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}',
-                score=0.75
-            ),
+            month_range_pattern,
             Pattern(
                 name="work_date_pattern2",
                 regex=r'\b(?:19|20)\d{2}\s+to\s+(?:19|20)\d{2}|[Pp]resent\b',
@@ -334,7 +629,7 @@ def configure_resume_recognizers(selected_types: Optional[List[str]] = None):
             ),
             Pattern(
                 name="company_name_pattern4",
-                regex=r'[Ww]orked\s+(?:at|for|with)\s+([A-Z][A-Za-z0-9\s&,.]+(?:Inc|LLC|Ltd|Limited|Corp|Corporation|Co|Company))',
+                regex=_COMPANY_WORKED_RE_STR,
                 score=0.7
             )
         ]
@@ -360,7 +655,7 @@ def configure_resume_recognizers(selected_types: Optional[List[str]] = None):
             ),
             Pattern(
                 name="school_name_pattern3",
-                regex=r'(?:[A-Z][a-z]+\s+)+(?:University|College|Institute|School)',
+                regex=_SCHOOL_NAME_RE_STR,
                 score=0.7
             )
         ]
@@ -397,15 +692,28 @@ def configure_resume_recognizers(selected_types: Optional[List[str]] = None):
         )
         recognizers.append(age_recognizer)
 
-    return recognizers
+    return tuple(recognizers)
 
 
 # 初始化分析引擎和匿名化引擎
-def init_engines(selected_types=None):
-    """初始化分析引擎和匿名化引擎"""
+def init_engines(selected_types=None, use_gpu=False):
+    """
+    初始化分析引擎和匿名化引擎
+
+    Args:
+        selected_types: 可选的敏感信息类型列表
+        use_gpu: 是否在加载spaCy模型前启用GPU(需安装en_core_web_trf等transformer模型才有明显收益)
+
+    Returns:
+        tuple: (analyzer, anonymizer)
+    """
     if not PRESIDIO_AVAILABLE:
         return None, None
 
+    if use_gpu:
+        import spacy
+        spacy.require_gpu()
+
     analyzer = AnalyzerEngine()
     for recognizer in configure_resume_recognizers(selected_types):
         analyzer.registry.add_recognizer(recognizer)
@@ -416,6 +724,7 @@ def init_engines(selected_types=None):
 
 
 # 提取简历ID或生成唯一标识符
+@lru_cache(maxsize=100_000)
 def extract_resume_id(resume_content):
     """
     从简历内容中提取ID或生成唯一标识符
@@ -427,19 +736,60 @@ def extract_resume_id(resume_content):
         str: 简历ID或唯一标识符
     """
     # 尝试从内容中提取电子邮件作为ID
-    email_match = re.search(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', resume_content)
+    email_match = _EMAIL_RE.search(resume_content)
     if email_match:
         # 对电子邮件进行哈希处理以保护隐私
-        return f"email-{hashlib.md5(email_match.group().encode()).hexdigest()[:8]}"
+        return f"email-{hashlib.blake2b(email_match.group().encode(), digest_size=4).hexdigest()}"
 
     # 尝试从内容中提取姓名作为ID
-    name_match = re.search(r'\b([A-Z][a-z]+\s+[A-Z][a-z]+)\b', resume_content)
+    name_match = _NAME_RE.search(resume_content)
     if name_match:
         # 对姓名进行哈希处理以保护隐私
-        return f"name-{hashlib.md5(name_match.group().encode()).hexdigest()[:8]}"
+        return f"name-{hashlib.blake2b(name_match.group().encode(), digest_size=4).hexdigest()}"
 
     # 如果都没找到，使用内容的哈希值
-    return f"resume-{hashlib.md5(resume_content.encode()).hexdigest()[:12]}"
+    return f"resume-{hashlib.blake2b(resume_content.encode(), digest_size=6).hexdigest()}"
+
+
+# 向量化提取简历ID用的模式：在ASCII文本上与_EMAIL_RE/_NAME_RE的匹配完全一致
+# (pyarrow字符串列的str.extract由RE2执行，其\s不含\v等字符，这里显式写出re的ASCII空白字符)
+_EMAIL_ID_RE_STR = f"({_EMAIL_RE.pattern})"
+_NAME_ID_RE_STR = r'\b([A-Z][a-z]+[ \t\n\r\f\v\x1c-\x1f]+[A-Z][a-z]+)\b'
+
+
+# 批量提取简历ID
+def extract_resume_ids(texts: pd.Series) -> pd.Series:
+    """
+    按列向量化提取电子邮件/姓名后生成简历ID，结果与逐条调用extract_resume_id一致；
+    含非ASCII字符的文本(Unicode的\\b、\\s语义与RE2不同)逐条回退到extract_resume_id
+
+    Args:
+        texts: 简历内容列
+
+    Returns:
+        pd.Series: 简历ID，索引与输入一致(非字符串内容为None)
+    """
+    texts = texts.astype(_STRING_DTYPE)
+    # Series.str.isascii仅pandas 3.0及以上提供
+    is_ascii = texts.map(str.isascii, na_action='ignore')
+    emails = texts.str.extract(_EMAIL_ID_RE_STR, expand=False)
+    names = texts.str.extract(_NAME_ID_RE_STR, expand=False)
+
+    ids = []
+    append = ids.append
+    for text, ascii_only, email, name in zip(texts.to_numpy(dtype=object), is_ascii.to_numpy(dtype=object),
+                                             emails.to_numpy(dtype=object), names.to_numpy(dtype=object)):
+        if not isinstance(text, str):
+            append(None)
+        elif not ascii_only:
+            append(extract_resume_id(text))
+        elif isinstance(email, str):
+            append(f"email-{hashlib.blake2b(email.encode(), digest_size=4).hexdigest()}")
+        elif isinstance(name, str):
+            append(f"name-{hashlib.blake2b(name.encode(), digest_size=4).hexdigest()}")
+        else:
+            append(f"resume-{hashlib.blake2b(text.encode(), digest_size=6).hexdigest()}")
+    return pd.Series(ids, index=texts.index, dtype=object)
 
 
 # 额外的敏感信息提取函数
@@ -456,8 +806,7 @@ def extract_additional_pii(text):
     results = []
 
     # 1. 提取出生日期和性别组合
-    dob_gender_match = re.search(r'Date\s+of\s+Birth\s*\(\s*Gender\s*\)\s*:\s*(\d{4}-\d{2}-\d{2})\s*\(\s*([MF])\s*\)',
-                                 text)
+    dob_gender_match = _DOB_GENDER_RE.search(text)
     if dob_gender_match:
         dob = dob_gender_match.group(1)
         gender = dob_gender_match.group(2)
@@ -479,7 +828,7 @@ def extract_additional_pii(text):
         })
 
     # 2. 提取家庭信息
-    family_match = re.search(r'(?:Father|Mother)(?:\'|\')?s\s+Name\s*[:：]\s*([^\n]+)', text)
+    family_match = _FAMILY_RE.search(text)
     if family_match:
         family_info = family_match.group(1).strip()
 
@@ -492,7 +841,7 @@ def extract_additional_pii(text):
         })
 
     # 3. 提取婚姻状况
-    marital_match = re.search(r'Marital\s+Status\s*[:：]\s*([^\n,]+)', text)
+    marital_match = _MARITAL_RE.search(text)
     if marital_match:
         marital_status = marital_match.group(1).strip()
 
@@ -505,7 +854,7 @@ def extract_additional_pii(text):
         })
 
     # 4. 提取国籍信息
-    nationality_match = re.search(r'Nationality\s*[:：]\s*([^\n,]+)', text)
+    nationality_match = _NATIONALITY_RE.search(text)
     if nationality_match:
         nationality = nationality_match.group(1).strip()
 
@@ -518,7 +867,7 @@ def extract_additional_pii(text):
         })
 
     # 5. 提取照片引用
-    photo_match = re.search(r'(?:Photo|Picture|Image)\s*[:：]?\s*([^\n]+\.(?:jpg|jpeg|png|gif))', text)
+    photo_match = _PHOTO_RE.search(text)
     if photo_match:
         photo_ref = photo_match.group(1).strip()
 
@@ -533,6 +882,11 @@ def extract_additional_pii(text):
     return results
 
 
+def _is_blank(text) -> bool:
+    """判断是否为非字符串或空白文本(不像strip()那样复制整段文本)"""
+    return not isinstance(text, str) or not text or text.isspace()
+
+
 # 使用正则表达式的基本脱敏处理
 def basic_anonymize_text(text, selected_types=None):
     """
@@ -545,164 +899,197 @@ def basic_anonymize_text(text, selected_types=None):
     Returns:
         tuple: (脱敏后的文本, 敏感信息字典)
     """
-    if not isinstance(text, str) or len(text.strip()) == 0:
+    if _is_blank(text):
         return text, {}
 
     # 如果未指定类型，使用所有类型
     if selected_types is None:
         selected_types = list(SENSITIVE_INFO_TYPES.keys())
 
-    anonymized_text = text
-    pii_entities = defaultdict(list)
+    # 预筛：优先用hyperscan一次扫描得到可能命中的类型；
+    # 否则按必要字面量筛选，文本中不含必要字面量的类型不可能命中，直接跳过
+    hit_types = _hyperscan_hit_types(text)
+    if hit_types is not None:
+        active_types = frozenset(entity_type for entity_type in selected_types if entity_type in hit_types)
+    else:
+        active_types = frozenset(
+            entity_type for entity_type in selected_types
+            if entity_type in _PATTERNS_BY_TYPE and (
+                entity_type not in _REQUIRED_LITERALS
+                or any(literal in text for literal in _REQUIRED_LITERALS[entity_type])
+            )
+        )
+    patterns = _active_patterns(active_types)
+
+    # 用保持插入顺序的dict做集合去重，避免在列表中线性查找
+    pii_entities = defaultdict(dict)
+
+    # 每个模式各自search(保留re对各模式字面量前缀的快速定位)，用最小堆按(起点, 模式顺序)取下一个匹配：
+    # 从左到右取互不重叠的匹配，同一起点优先取靠前的模式，逐段拼接输出
+    heap = []
+    for order, (pattern, _, _, _) in enumerate(patterns):
+        match = pattern.search(text)
+        if match:
+            heap.append((match.start(), order, match))
+    heapq.heapify(heap)
+
+    # 循环内频繁调用的方法先绑定到局部变量，减少属性查找
+    parts = []
+    append = parts.append
+    heappop, heapreplace = heapq.heappop, heapq.heapreplace
+    cursor = 0
+    while heap:
+        segment_start, order, match = heap[0]
+        pattern, entity_key, entity_group, replacement = patterns[order]
+        if segment_start >= cursor:
+            pii_entities[entity_key][match.group(entity_group)] = None
+
+            append(text[cursor:segment_start])
+            if callable(replacement):
+                # 如果替换值是函数，则按实体在片段中的位置替换
+                append(replacement(match.group(),
+                                   match.start(entity_group) - segment_start,
+                                   match.end(entity_group) - segment_start))
+            else:
+                # 直接替换
+                append(replacement)
+            cursor = match.end()
+
+        # 该模式从已输出片段之后继续查找下一个匹配(与已替换片段重叠的匹配直接丢弃)
+        next_match = pattern.search(text, cursor)
+        if next_match:
+            heapreplace(heap, (next_match.start(), order, next_match))
+        else:
+            heappop(heap)
+    append(text[cursor:])
 
-    # 定义正则表达式模式和替换值
-    patterns = []
+    return "".join(parts), {k: list(v) for k, v in pii_entities.items()}
 
-    # 个人姓名
-    if "PERSON_NAME" in selected_types:
-        patterns.extend([
-            (r'\b([A-Z][a-z]+\s+[A-Z][a-z]+)\b', "PERSON_NAME", "<NAME>"),
-            (r"Father(?:'|')?s Name\s*[:：]\s*([^\n,]+)", "PERSON_NAME", "Father's Name: <NAME>"),
-            (r"Mother(?:'|')?s Name\s*[:：]\s*([^\n,]+)", "PERSON_NAME", "Mother's Name: <NAME>")
-        ])
 
-    # 电子邮件地址
-    if "EMAIL_ADDRESS" in selected_types:
-        patterns.append(
-            (r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', "EMAIL_ADDRESS", "<EMAIL>")
-        )
+# 按内容哈希缓存的脱敏结果: (内容摘要, 类型集合, 是否使用Presidio) -> (脱敏后的文本, 敏感信息字典)
+# 按最近使用淘汰，条数有上限，常驻内存不随数据集增长
+_ANONYMIZE_CACHE_SIZE = 4096
+_anonymize_cache: Dict[Tuple[bytes, frozenset, bool], Tuple[str, dict]] = OrderedDict()
 
-    # 电话号码
-    if "PHONE_NUMBER" in selected_types:
-        patterns.extend([
-            (r'\b(?:\+\d{1,3}[-.\s]?)?(?:\(?\d{3}\)?[-.\s]?){1,2}\d{3,4}[-.\s]?\d{3,4}\b', "PHONE_NUMBER", "<PHONE>"),
-            (
-            r'(?:Phone|Tel|Mobile|Contact)(?:\s*(?:Number|No|#|\:))?\s*[:：]?\s*(\+?[\d\s\(\)\-\.]{7,})', "PHONE_NUMBER",
-            lambda m: m.group().replace(m.group(1), "<PHONE>"))
-        ])
 
-    # 社交媒体链接
-    if "SOCIAL_MEDIA" in selected_types:
-        patterns.extend([
-            (r'(?:linkedin\.com/in/[a-zA-Z0-9_-]+)', "SOCIAL_MEDIA", "<LINKEDIN>"),
-            (r'(?:github\.com/[a-zA-Z0-9_-]+)', "SOCIAL_MEDIA", "<GITHUB>"),
-            (r'(?:twitter\.com/[a-zA-Z0-9_-]+)', "SOCIAL_MEDIA", "<TWITTER>"),
-            (r'(?:facebook\.com/[a-zA-Z0-9_.-]+)', "SOCIAL_MEDIA", "<FACEBOOK>")
-        ])
+def _cache_get(key):
+    """读取缓存的脱敏结果，命中时标记为最近使用；未命中返回None"""
+    result = _anonymize_cache.get(key)
+    if result is not None:
+        _anonymize_cache.move_to_end(key)
+    return result
 
-    # 出生日期
-    if "DATE_OF_BIRTH" in selected_types:
-        patterns.extend([
-            (r'(?:Date\s+of\s+Birth|DOB|Birth\s+Date)(?:\s*(?:\:|\())?\s*(\d{1,2}[-/\.]\d{1,2}[-/\.]\d{2,4})',
-             "DATE_OF_BIRTH", lambda m: m.group().replace(m.group(1), "<DOB>")),
-            (r'(?:Date\s+of\s+Birth|DOB|Birth\s+Date)(?:\s*(?:\:|\())?\s*(\d{4}[-/\.]\d{1,2}[-/\.]\d{1,2})',
-             "DATE_OF_BIRTH", lambda m: m.group().replace(m.group(1), "<DOB>")),
-            (r'(?:Date\s+of\s+Birth|DOB|Birth\s+Date)(?:\s*(?:\:|\())?\s*([A-Za-z]+\s+\d{1,2},?\s+\d{4})',
-             "DATE_OF_BIRTH", lambda m: m.group().replace(m.group(1), "<DOB>"))
-        ])
 
-    # 性别信息
-    if "GENDER" in selected_types:
-        patterns.extend([
-            (r'(?:Gender|Sex)\s*[:：]\s*([^\n,]+)', "GENDER", lambda m: m.group().replace(m.group(1), "<GENDER>")),
-            (r'\((?:M|F|Male|Female|男|女)\)', "GENDER", "(<GENDER>)"),
-            (r'Gender\s*[:-]?\s*(Male|Female|M|F|男|女)', "GENDER", lambda m: m.group().replace(m.group(1), "<GENDER>"))
-        ])
+def _cache_put(key, result):
+    """写入脱敏结果，超出上限时淘汰最久未使用的条目"""
+    _anonymize_cache[key] = result
+    _anonymize_cache.move_to_end(key)
+    if len(_anonymize_cache) > _ANONYMIZE_CACHE_SIZE:
+        _anonymize_cache.popitem(last=False)
 
-    # 婚姻状况
-    if "MARITAL_STATUS" in selected_types:
-        patterns.append(
-            (r'(?:Marital\s+Status|Marriage\s+Status)\s*[:：]\s*([^\n,]+)', "MARITAL_STATUS",
-             lambda m: m.group().replace(m.group(1), "<MARITAL_STATUS>"))
-        )
 
-    # 地址信息
+def _cache_key(text, selected_types, use_presidio):
+    """生成脱敏结果缓存键"""
+    digest = hashlib.blake2b(text.encode(), digest_size=16).digest()
+    types_key = frozenset(SENSITIVE_INFO_TYPES if selected_types is None else selected_types)
+    return digest, types_key, use_presidio
+
+
+# 映射Presidio支持的实体类型
+def _presidio_entities(selected_types):
+    """将选定的敏感信息类型映射为Presidio实体类型列表"""
+    presidio_entities = []
+
+    # 添加Presidio内置的实体类型
+    if "PERSON_NAME" in selected_types:
+        presidio_entities.extend(["PERSON", "NRP"])
+    if "EMAIL_ADDRESS" in selected_types:
+        presidio_entities.append("EMAIL_ADDRESS")
+    if "PHONE_NUMBER" in selected_types:
+        presidio_entities.append("PHONE_NUMBER")
     if "ADDRESS" in selected_types:
-        patterns.extend([
-            (r'\b\d+\s+[A-Za-z0-9\s,]+(?:Street|Avenue|Road|Blvd|Drive|Lane|Place|Way|Apt|Suite|St|Rd|Dr|Ave)\b',
-             "ADDRESS", "<ADDRESS>"),
-            (
-            r'(?:Address|Location)\s*[:：]\s*([^\n]+)', "ADDRESS", lambda m: m.group().replace(m.group(1), "<ADDRESS>")),
-            (r'\b\d+/[A-Za-z0-9],?\s+[A-Za-z0-9\s,]+,\s+[A-Za-z\s]+,\s+[A-Za-z\s]+\b', "ADDRESS", "<ADDRESS>")
-        ])
+        presidio_entities.append("ADDRESS")
+    if "LOCATION" in selected_types:
+        presidio_entities.append("LOCATION")
+
+    # 添加自定义实体类型
+    for entity_type in selected_types:
+        if entity_type not in ["PERSON_NAME", "EMAIL_ADDRESS", "PHONE_NUMBER", "ADDRESS", "LOCATION"]:
+            presidio_entities.append(entity_type)
+
+    return presidio_entities
+
+
+# 匿名化操作配置(只依赖常量，模块导入时构建一次)
+if PRESIDIO_AVAILABLE:
+    _OPERATORS = {
+        "DEFAULT": OperatorConfig("replace", {"new_value": "<REDACTED>"}),
+        "PERSON_NAME": OperatorConfig("replace", {"new_value": "<NAME>"}),
+        "PERSON": OperatorConfig("replace", {"new_value": "<NAME>"}),
+        "NRP": OperatorConfig("replace", {"new_value": "<NAME>"}),
+        "EMAIL_ADDRESS": OperatorConfig("replace", {"new_value": "<EMAIL>"}),
+        "PHONE_NUMBER": OperatorConfig("replace", {"new_value": "<PHONE>"}),
+        "SOCIAL_MEDIA": OperatorConfig("replace", {"new_value": "<SOCIAL_MEDIA>"}),
+        "DATE_OF_BIRTH": OperatorConfig("replace", {"new_value": "<DOB>"}),
+        "GENDER": OperatorConfig("replace", {"new_value": "<GENDER>"}),
+        "MARITAL_STATUS": OperatorConfig("replace", {"new_value": "<MARITAL_STATUS>"}),
+        "FAMILY_INFO": OperatorConfig("replace", {"new_value": "<FAMILY_INFO>"}),
+        "ADDRESS": OperatorConfig("replace", {"new_value": "<ADDRESS>"}),
+        "EDUCATION_DATES": OperatorConfig("replace", {"new_value": "<EDUCATION_DATES>"}),
+        "WORK_DATES": OperatorConfig("replace", {"new_value": "<WORK_DATES>"}),
+        "PHOTO_REFERENCES": OperatorConfig("replace", {"new_value": "<PHOTO>"}),
+        "AGE": OperatorConfig("replace", {"new_value": "<AGE>"}),
+        "NATIONALITY": OperatorConfig("replace", {"new_value": "<NATIONALITY>"}),
+        "RELIGION": OperatorConfig("replace", {"new_value": "<RELIGION>"}),
+        "LOCATION": OperatorConfig("replace", {"new_value": "<LOCATION>"}),
+        "COMPANY_NAME": OperatorConfig("replace", {"new_value": "<COMPANY>"}),
+        "SCHOOL_NAME": OperatorConfig("replace", {"new_value": "<SCHOOL>"})
+    }
+
+
+# 根据分析结果收集敏感信息并完成匿名化
+def _presidio_apply(text, results, anonymizer, selected_types):
+    """
+    合并额外提取的敏感信息，收集实体并调用匿名化引擎
+
+    Args:
+        text: 文本内容
+        results: Presidio分析结果
+        anonymizer: Presidio匿名化引擎
+        selected_types: 敏感信息类型列表
+
+    Returns:
+        tuple: (脱敏后的文本, 敏感信息字典)
+    """
+    # 添加额外提取的敏感信息
+    additional_results = extract_additional_pii(text)
+    for additional_entity in additional_results:
+        # 如果实体类型在选定类型中，则添加
+        if additional_entity["entity_type"] in selected_types:
+            results.append(
+                RecognizerResult(
+                    entity_type=additional_entity["entity_type"],
+                    start=additional_entity["start"],
+                    end=additional_entity["end"],
+                    score=additional_entity["score"],
+                    analysis_explanation=None
+                )
+            )
+
+    # 收集识别到的敏感信息(保持插入顺序的dict做集合去重)
+    pii_entities = defaultdict(dict)
+    for result in results:
+        pii_entities[result.entity_type.lower()][text[result.start:result.end]] = None
+
+    # 匿名化处理
+    anonymized = anonymizer.anonymize(
+        text=text,
+        analyzer_results=results,
+        operators=_OPERATORS
+    )
+
+    return anonymized.text, {k: list(v) for k, v in pii_entities.items()}
 
-    # 教育日期
-        # 教育日期
-        if "EDUCATION_DATES" in selected_types:
-            patterns.extend([
-                (
-                r'(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}\s+to\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}',
-                "EDUCATION_DATES", "<EDUCATION_DATES>"),
-                (r'\b(?:19|20)\d{2}\s+to\s+(?:19|20)\d{2}\b', "EDUCATION_DATES", "<EDUCATION_DATES>"),
-                (r'\b(?:19|20)\d{2}\s*[-–]\s*(?:19|20)\d{2}\b', "EDUCATION_DATES", "<EDUCATION_DATES>"),
-                (r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4}\b', "EDUCATION_DATES", "<DATE>")
-            ])
-
-        # 工作日期
-        if "WORK_DATES" in selected_types:
-            patterns.extend([
-                (
-                r'(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}\s+to\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}',
-                "WORK_DATES", "<WORK_DATES>"),
-                (r'\b(?:19|20)\d{2}\s+to\s+(?:19|20)\d{2}|[Pp]resent\b', "WORK_DATES", "<WORK_DATES>"),
-                (r'\b(?:19|20)\d{2}\s*[-–]\s*(?:19|20)\d{2}|[Pp]resent\b', "WORK_DATES", "<WORK_DATES>")
-            ])
-
-        # 公司名称
-        if "COMPANY_NAME" in selected_types:
-            patterns.extend([
-                (r'[Cc]ompany\s*[-:]?\s*([^\n,]+)', "COMPANY_NAME",
-                 lambda m: m.group().replace(m.group(1), "<COMPANY>")),
-                (r'[Cc]ompany\s+[Nn]ame\s*[:：]\s*([^\n,]+)', "COMPANY_NAME",
-                 lambda m: m.group().replace(m.group(1), "<COMPANY>")),
-                (r'[Ee]mployer\s*[:：]\s*([^\n,]+)', "COMPANY_NAME",
-                 lambda m: m.group().replace(m.group(1), "<COMPANY>")),
-                (
-                r'[Ww]orked\s+(?:at|for|with)\s+([A-Z][A-Za-z0-9\s&,.]+(?:Inc|LLC|Ltd|Limited|Corp|Corporation|Co|Company))',
-                "COMPANY_NAME", lambda m: m.group().replace(m.group(1), "<COMPANY>"))
-            ])
-
-        # 学校名称
-        if "SCHOOL_NAME" in selected_types:
-            patterns.extend([
-                (r'(?:University|College|Institute|School)\s+of\s+([^\n,]+)', "SCHOOL_NAME",
-                 lambda m: m.group().replace(m.group(1), "<SCHOOL>")),
-                (r'(?:University|College|Institute|School)\s*[:：]\s*([^\n,]+)', "SCHOOL_NAME",
-                 lambda m: m.group().replace(m.group(1), "<SCHOOL>")),
-                (r'(?:[A-Z][a-z]+\s+)+(?:University|College|Institute|School)', "SCHOOL_NAME", "<SCHOOL>")
-            ])
-
-        # 年龄信息
-        if "AGE" in selected_types:
-            patterns.extend([
-                (r'(?:Age|Years)\s*[:：]\s*(\d{1,2})', "AGE", lambda m: m.group().replace(m.group(1), "<AGE>")),
-                (r'(\d{1,2})\s+[Yy]ears\s+[Oo]ld', "AGE", lambda m: m.group().replace(m.group(1), "<AGE>")),
-                (r'[Aa]ge[:：]?\s*(\d{1,2})', "AGE", lambda m: m.group().replace(m.group(1), "<AGE>"))
-            ])
-
-        # 应用所有模式
-        for pattern, entity_type, replacement in patterns:
-            matches = re.finditer(pattern, anonymized_text)
-            for match in matches:
-                if callable(replacement):
-                    # 如果替换值是函数，则调用它
-                    entity_text = match.group(1) if match.groups() else match.group(0)
-                    if entity_text not in pii_entities[entity_type.lower()]:
-                        pii_entities[entity_type.lower()].append(entity_text)
-
-                    # 应用替换函数
-                    segment = match.group(0)
-                    replaced_segment = replacement(match)
-                    anonymized_text = anonymized_text.replace(segment, replaced_segment)
-                else:
-                    # 直接替换
-                    entity_text = match.group(1) if match.groups() else match.group(0)
-                    if entity_text not in pii_entities[entity_type.lower()]:
-                        pii_entities[entity_type.lower()].append(entity_text)
-
-                    anonymized_text = anonymized_text.replace(match.group(0), replacement)
-
-        return anonymized_text, dict(pii_entities)
 
 # 使用Presidio进行高级脱敏处理
 def presidio_anonymize_text(text, analyzer, anonymizer, selected_types=None):
@@ -718,7 +1105,7 @@ def presidio_anonymize_text(text, analyzer, anonymizer, selected_types=None):
     Returns:
         tuple: (脱敏后的文本, 敏感信息字典)
     """
-    if not isinstance(text, str) or len(text.strip()) == 0:
+    if _is_blank(text):
         return text, {}
 
     # 如果未指定类型，使用所有类型
@@ -726,99 +1113,86 @@ def presidio_anonymize_text(text, analyzer, anonymizer, selected_types=None):
         selected_types = list(SENSITIVE_INFO_TYPES.keys())
 
     try:
-        # 映射Presidio支持的实体类型
-        presidio_entities = []
-
-        # 添加Presidio内置的实体类型
-        if "PERSON_NAME" in selected_types:
-            presidio_entities.extend(["PERSON", "NRP"])
-        if "EMAIL_ADDRESS" in selected_types:
-            presidio_entities.append("EMAIL_ADDRESS")
-        if "PHONE_NUMBER" in selected_types:
-            presidio_entities.append("PHONE_NUMBER")
-        if "ADDRESS" in selected_types:
-            presidio_entities.append("ADDRESS")
-        if "LOCATION" in selected_types:
-            presidio_entities.append("LOCATION")
-
-        # 添加自定义实体类型
-        for entity_type in selected_types:
-            if entity_type not in ["PERSON_NAME", "EMAIL_ADDRESS", "PHONE_NUMBER", "ADDRESS", "LOCATION"]:
-                presidio_entities.append(entity_type)
-
         # 识别敏感实体
         results = analyzer.analyze(
             text=text,
             language="en",
-            entities=presidio_entities,
+            entities=_presidio_entities(selected_types),
             score_threshold=0.65
         )
 
-        # 添加额外提取的敏感信息
-        additional_results = extract_additional_pii(text)
-        for additional_entity in additional_results:
-            # 如果实体类型在选定类型中，则添加
-            if additional_entity["entity_type"] in selected_types:
-                results.append(
-                    RecognizerResult(
-                        entity_type=additional_entity["entity_type"],
-                        start=additional_entity["start"],
-                        end=additional_entity["end"],
-                        score=additional_entity["score"],
-                        analysis_explanation=None
-                    )
-                )
-
-        # 收集识别到的敏感信息
-        pii_entities = defaultdict(list)
-        for result in results:
-            entity_text = text[result.start:result.end]
-            entity_type = result.entity_type.lower()
-            if entity_text not in pii_entities[entity_type]:
-                pii_entities[entity_type].append(entity_text)
-
-        # 配置匿名化操作
-        operators = {
-            "DEFAULT": OperatorConfig("replace", {"new_value": "<REDACTED>"}),
-            "PERSON_NAME": OperatorConfig("replace", {"new_value": "<NAME>"}),
-            "PERSON": OperatorConfig("replace", {"new_value": "<NAME>"}),
-            "NRP": OperatorConfig("replace", {"new_value": "<NAME>"}),
-            "EMAIL_ADDRESS": OperatorConfig("replace", {"new_value": "<EMAIL>"}),
-            "PHONE_NUMBER": OperatorConfig("replace", {"new_value": "<PHONE>"}),
-            "SOCIAL_MEDIA": OperatorConfig("replace", {"new_value": "<SOCIAL_MEDIA>"}),
-            "DATE_OF_BIRTH": OperatorConfig("replace", {"new_value": "<DOB>"}),
-            "GENDER": OperatorConfig("replace", {"new_value": "<GENDER>"}),
-            "MARITAL_STATUS": OperatorConfig("replace", {"new_value": "<MARITAL_STATUS>"}),
-            "FAMILY_INFO": OperatorConfig("replace", {"new_value": "<FAMILY_INFO>"}),
-            "ADDRESS": OperatorConfig("replace", {"new_value": "<ADDRESS>"}),
-            "EDUCATION_DATES": OperatorConfig("replace", {"new_value": "<EDUCATION_DATES>"}),
-            "WORK_DATES": OperatorConfig("replace", {"new_value": "<WORK_DATES>"}),
-            "PHOTO_REFERENCES": OperatorConfig("replace", {"new_value": "<PHOTO>"}),
-            "AGE": OperatorConfig("replace", {"new_value": "<AGE>"}),
-            "NATIONALITY": OperatorConfig("replace", {"new_value": "<NATIONALITY>"}),
-            "RELIGION": OperatorConfig("replace", {"new_value": "<RELIGION>"}),
-            "LOCATION": OperatorConfig("replace", {"new_value": "<LOCATION>"}),
-            "COMPANY_NAME": OperatorConfig("replace", {"new_value": "<COMPANY>"}),
-            "SCHOOL_NAME": OperatorConfig("replace", {"new_value": "<SCHOOL>"})
-        }
-
-        # 匿名化处理
-        anonymized = anonymizer.anonymize(
-            text=text,
-            analyzer_results=results,
-            operators=operators
-        )
-
-        return anonymized.text, dict(pii_entities)
+        return _presidio_apply(text, results, anonymizer, selected_types)
     except Exception as e:
-        print(f"使用Presidio处理文本时出错: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("使用Presidio处理文本时出错: %s", e)
 
         # 出错时使用基本的正则表达式替换方法
-        print("尝试使用基本方法处理文本...")
+        log.info("尝试使用基本方法处理文本...")
         return basic_anonymize_text(text, selected_types)
 
+
+# 使用Presidio批量脱敏处理
+def batch_presidio_anonymize(texts, analyzer, anonymizer, selected_types=None, batch_size=64, n_process=1):
+    """
+    使用BatchAnalyzerEngine按批分析文本，spaCy内部以nlp.pipe批处理，减少逐条分析的开销
+
+    Args:
+        texts: 文本列表
+        analyzer: Presidio分析引擎
+        anonymizer: Presidio匿名化引擎
+        selected_types: 可选的敏感信息类型列表
+        batch_size: spaCy批处理大小
+        n_process: spaCy nlp.pipe的进程数，大于1时NER在多个进程中并行
+
+    Returns:
+        list: 与输入顺序一致的 (脱敏后的文本, 敏感信息字典) 列表
+    """
+    # 如果未指定类型，使用所有类型
+    if selected_types is None:
+        selected_types = list(SENSITIVE_INFO_TYPES.keys())
+
+    texts = list(texts)
+    outputs = [(text, {}) for text in texts]
+
+    # 相同内容只分析一次：已缓存的直接复用，其余按内容哈希归并
+    pending = {}
+    for i, text in enumerate(texts):
+        if _is_blank(text):
+            continue
+        key = _cache_key(text, selected_types, True)
+        cached = _cache_get(key)
+        if cached is not None:
+            outputs[i] = cached
+        else:
+            pending.setdefault(key, []).append(i)
+    unique_items = [(key, indices[0]) for key, indices in pending.items()]
+
+    try:
+        batch_analyzer = BatchAnalyzerEngine(analyzer_engine=analyzer)
+        batch_results = batch_analyzer.analyze_iterator(
+            [texts[i] for _, i in unique_items],
+            language="en",
+            batch_size=batch_size,
+            n_process=n_process,
+            entities=_presidio_entities(selected_types),
+            score_threshold=0.65
+        )
+    except Exception as e:
+        log.warning("批量分析文本时出错: %s，改为逐条处理", e)
+        return [process_text(text, analyzer, anonymizer, selected_types) for text in texts]
+
+    for (key, i), results in zip(unique_items, batch_results):
+        try:
+            result = _presidio_apply(texts[i], list(results), anonymizer, selected_types)
+        except Exception as e:
+            log.exception("使用Presidio处理文本时出错: %s", e)
+            result = basic_anonymize_text(texts[i], selected_types)
+
+        _cache_put(key, result)
+        for j in pending[key]:
+            outputs[j] = result
+
+    return outputs
+
 # 脱敏处理函数
 def process_text(text: str, analyzer=None, anonymizer=None, selected_types=None):
     """
@@ -833,167 +1207,460 @@ def process_text(text: str, analyzer=None, anonymizer=None, selected_types=None)
     Returns:
         tuple: (anonymized_text, pii_entities)
     """
-    if not isinstance(text, str) or len(text.strip()) == 0:
+    if _is_blank(text):
         return text, {}
 
+    use_presidio = bool(PRESIDIO_AVAILABLE and analyzer and anonymizer)
+
+    # 重复内容直接复用缓存结果
+    key = _cache_key(text, selected_types, use_presidio)
+    cached = _cache_get(key)
+    if cached is not None:
+        return cached
+
     try:
         # 如果Presidio可用且引擎已初始化，则使用Presidio
-        if PRESIDIO_AVAILABLE and analyzer and anonymizer:
-            return presidio_anonymize_text(text, analyzer, anonymizer, selected_types)
+        if use_presidio:
+            result = presidio_anonymize_text(text, analyzer, anonymizer, selected_types)
         else:
             # 否则使用基本的正则表达式替换
-            return basic_anonymize_text(text, selected_types)
+            result = basic_anonymize_text(text, selected_types)
     except Exception as e:
-        print(f"处理文本时出错: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("处理文本时出错: %s", e)
 
         # 最后的备用方案：返回原文本和空的敏感信息字典
         return text, {}
 
-# 数据预处理管道
-# 修改后的数据处理函数
-def process_resume_dataset(input_path: str, output_path: str, pii_json_path: str,
-                           selected_types=None, sample_size=None, content_column=None):
+    _cache_put(key, result)
+    return result
+
+# 工作进程内的引擎和配置(由_init_worker初始化)
+_worker_engines = (None, None)
+_worker_types = None
+_worker_n_process = 1
+
+# 每次提交给工作进程的连续文本条数
+_WORKER_SLICE = 256
+
+
+def _init_worker(selected_types, use_gpu=False, n_process=1):
+    """在每个工作进程中初始化一次引擎"""
+    global _worker_engines, _worker_types, _worker_n_process
+    _worker_engines = init_engines(selected_types, use_gpu)
+    _worker_types = selected_types
+    _worker_n_process = n_process
+
+
+def _anonymize_slice(texts):
+    """工作进程中处理一段文本：Presidio可用时按批分析，否则逐条使用正则"""
+    analyzer, anonymizer = _worker_engines
+    if PRESIDIO_AVAILABLE and analyzer and anonymizer:
+        return batch_presidio_anonymize(texts, analyzer, anonymizer, _worker_types, n_process=_worker_n_process)
+    return [process_text(text, analyzer, anonymizer, _worker_types) for text in texts]
+
+
+# 创建脱敏进程池
+def create_worker_pool(max_workers: int, selected_types=None, use_gpu=False,
+                       n_process=1) -> Optional[ProcessPoolExecutor]:
     """
-    执行完整数据处理流程
+    创建脱敏进程池，每个进程只初始化一次引擎，整个数据集的各块共用同一个进程池
 
     Args:
-        input_path: 输入文件路径
-        output_path: 输出文件路径
-        pii_json_path: 敏感信息JSON文件路径
+        max_workers: 进程数，不大于1时不创建进程池
         selected_types: 可选的敏感信息类型列表
-        sample_size: 抽样数量(调试用)
-        content_column: 简历内容所在的列名(如果为None，则合并相关列)
+        use_gpu: 是否使用GPU运行spaCy
+        n_process: 每个进程内spaCy nlp.pipe的进程数
+
+    Returns:
+        ProcessPoolExecutor或None: 使用完毕后需调用shutdown()
     """
-    try:
-        # 初始化引擎
-        analyzer, anonymizer = init_engines(selected_types)
+    if max_workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                               initargs=(selected_types, use_gpu, n_process))
 
-        # 读取数据
-        print(f"开始读取数据: {input_path}")
-        df = pd.read_csv(
-            input_path,
-            parse_dates=False,
-            encoding='utf-8',
-            engine='c',
-            memory_map=True,
-            on_bad_lines='warn'  # 处理错误行
-        )
 
-        print(f"成功读取数据，共 {len(df)} 条记录")
-        print(f"数据集列名: {df.columns.tolist()}")
+# 批量脱敏处理
+def anonymize_series(texts: pd.Series, analyzer=None, anonymizer=None,
+                     selected_types=None, n_process: int = 1,
+                     pool: Optional[ProcessPoolExecutor] = None) -> Tuple[pd.Series, pd.Series]:
+    """
+    对整列文本连续进行脱敏处理，避免pandas逐行apply的调度开销
 
-        # 数据抽样 (调试时启用)
-        if sample_size:
-            df = df.sample(min(sample_size, len(df)), random_state=42)
-            print(f"已抽样 {len(df)} 条记录用于处理")
+    Args:
+        texts: 文本列
+        analyzer: Presidio分析引擎
+        anonymizer: Presidio匿名化引擎
+        selected_types: 可选的敏感信息类型列表
+        n_process: 单进程批处理时spaCy nlp.pipe的进程数
+        pool: create_worker_pool创建的进程池，提供时按连续分片交给各进程处理，忽略analyzer和anonymizer
 
-        # 创建按简历ID组织的敏感信息字典
-        organized_entities = {}
+    Returns:
+        tuple: (脱敏后的文本Series, 敏感信息字典Series)，索引与输入一致
+    """
+    arr = texts.to_numpy(dtype=object)
+    if pool is not None:
+        slices = [arr[i:i + _WORKER_SLICE] for i in range(0, len(arr), _WORKER_SLICE)]
+        out = [result for part in tqdm(pool.map(_anonymize_slice, slices), total=len(slices)) for result in part]
+    elif PRESIDIO_AVAILABLE and analyzer and anonymizer:
+        out = batch_presidio_anonymize(arr, analyzer, anonymizer, selected_types, n_process=n_process)
+    else:
+        out = [process_text(t, analyzer, anonymizer, selected_types) for t in tqdm(arr)]
+    return (pd.Series([o[0] for o in out], index=texts.index),
+            pd.Series([o[1] for o in out], index=texts.index))
 
-        # 如果没有指定内容列，则合并相关列创建一个完整的简历内容
-        if content_column is None or content_column not in df.columns:
-            print("未找到指定的内容列，将尝试合并相关列...")
+# 将敏感信息字典转换为紧凑的长表
+def to_arrow(pii_dicts, index=None) -> pd.DataFrame:
+    """
+    将每条简历的敏感信息字典展开为长表，实体文本使用Arrow字符串存储，实体类型使用Categorical，
+    比object列占用更少内存，推荐作为anonymize_series输出的敏感信息Series的下游格式
 
-            # 确定可能包含简历内容的列
-            content_columns = []
-            for col in df.columns:
-                # 检查列名是否包含这些关键词
-                if any(keyword in col.lower() for keyword in
-                       ['description', 'detail', 'skill', 'education', 'company']):
-                    content_columns.append(col)
+    Args:
+        pii_dicts: 敏感信息字典序列(如anonymize_series返回的第二个Series)
+        index: 可选的简历索引，默认使用pii_dicts自身的索引或位置
 
-            if not content_columns:
-                # 如果没有找到明确的内容列，使用所有非ID列
-                content_columns = [col for col in df.columns if col.lower() != 'id']
+    Returns:
+        pd.DataFrame: 列为 resume_index, entity_type, entity
+    """
+    if index is None:
+        index = pii_dicts.index if isinstance(pii_dicts, pd.Series) else range(len(pii_dicts))
+
+    rows, types, entities = [], [], []
+    extend_rows, extend_types, extend_entities = rows.extend, types.extend, entities.extend
+    for idx, pii in zip(index, pii_dicts):
+        for entity_type, entity_list in (pii or {}).items():
+            extend_rows([idx] * len(entity_list))
+            extend_types([entity_type] * len(entity_list))
+            extend_entities(entity_list)
+
+    return pd.DataFrame({
+        "resume_index": rows,
+        "entity_type": pd.Categorical(types),
+        "entity": pd.array(entities, dtype=_STRING_DTYPE),
+    })
+
+# 敏感信息的增量写出与合并
+def _ndjson_line(record) -> bytes:
+    """将一条记录序列化为一行NDJSON(UTF-8字节)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(record) + b"\n"
+    return json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n"
+
+
+def merge_ndjson_to_json(ndjson_path: str, json_path: str) -> Dict[str, Any]:
+    """
+    将逐行写出的 {简历ID: 敏感信息} NDJSON合并为一个JSON对象文件，同一简历ID以后出现的为准
 
-            print(f"将合并以下列作为简历内容: {content_columns}")
+    Args:
+        ndjson_path: NDJSON文件路径
+        json_path: 输出JSON文件路径
 
-            # 创建一个新列，合并所有相关列的内容
-            df['combined_content'] = df.apply(
-                lambda row: '\n\n'.join(
-                    str(row[col]) for col in content_columns if pd.notna(row[col]) and str(row[col]).strip()),
-                axis=1
-            )
-            content_column = 'combined_content'
+    Returns:
+        dict: 合并后的 简历ID -> 敏感信息字典
+    """
+    loads = orjson.loads if ORJSON_AVAILABLE else json.loads
+    merged = {}
+    with open(ndjson_path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                merged.update(loads(line))
+
+    if ORJSON_AVAILABLE:
+        with open(json_path, 'wb') as f:
+            f.write(orjson.dumps(merged, option=orjson.OPT_INDENT_2))
+    else:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(merged, f, ensure_ascii=False, indent=2)
+    return merged
 
-        # 执行脱敏并收集敏感信息
-        print("⏳ 开始PII脱敏处理...")
 
-        # 定义处理函数
-        def process_resume(resume_content):
-            if not isinstance(resume_content, str) or len(resume_content.strip()) == 0:
-                return resume_content
+# 数据预处理管道
+def _warn_bad_row(row):
+    """PyArrow读取CSV时跳过并提示错误行(与pandas的on_bad_lines='warn'一致)"""
+    print(f"警告: 跳过第 {row.number} 行错误数据: {row.text[:100]}")
+    return 'skip'
 
-            resume_id = extract_resume_id(resume_content)
-            try:
-                anonymized_text, pii_entities = process_text(
-                    resume_content, analyzer, anonymizer, selected_types
-                )
 
-                # 如果识别到敏感信息，则保存
-                if pii_entities:
-                    organized_entities[resume_id] = pii_entities
-
-                return anonymized_text
-            except Exception as e:
-                print(f"处理简历 {resume_id} 时出错: {e}")
-                return resume_content
-
-        # 应用处理函数
-        df['anonymized_content'] = df[content_column].progress_apply(process_resume)
-
-        # 定期保存敏感信息，避免全部处理完才保存
-        def save_pii_data(current_pii_data, path, iteration):
-            temp_path = f"{path}.part{iteration}"
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(current_pii_data, f, ensure_ascii=False, indent=2)
-            print(f"已保存中间敏感信息到: {temp_path}")
-
-        # 每1000条记录保存一次
-        save_interval = 1000
-        for i in range(0, len(df), save_interval):
-            if i > 0 and len(organized_entities) > 0:
-                save_pii_data(organized_entities, pii_json_path, i // save_interval)
-
-        # 保存脱敏后的数据
-        print(f"保存处理结果到: {output_path}")
-        df.to_csv(
-            output_path,
-            index=False,
+def _read_csv_chunks(input_path: str, chunksize: int):
+    """
+    分块读取CSV：优先使用PyArrow多线程流式解析，字符串列保留Arrow存储；pyarrow不可用时回退到pandas
+
+    Args:
+        input_path: 输入文件路径
+        chunksize: 每块大约的行数
+
+    Returns:
+        generator: 依次产出DataFrame块，索引在各块间连续
+    """
+    if not PYARROW_AVAILABLE:
+        yield from pd.read_csv(
+            input_path,
+            parse_dates=False,
             encoding='utf-8',
-            quoting=2  # 对非数值字段强制添加引号
+            engine='c',
+            memory_map=True,
+            on_bad_lines='warn',  # 处理错误行
+            chunksize=chunksize
         )
+        return
+
+    # 先读表头，所有列按字符串读取：Arrow只根据第一个块推断类型，后续块出现不同类型的值会中途报错
+    with open(input_path, encoding='utf-8-sig', newline='') as f:
+        columns = next(csv.reader(f), [])
+
+    reader = pv.open_csv(
+        input_path,
+        read_options=pv.ReadOptions(use_threads=True, block_size=1 << 24),
+        # 简历正文中常有带引号的换行
+        parse_options=pv.ParseOptions(newlines_in_values=True, invalid_row_handler=_warn_bad_row),
+        # 空字符串按缺失值处理，与pandas一致
+        convert_options=pv.ConvertOptions(
+            column_types={column: pa.string() for column in columns},
+            strings_can_be_null=True
+        )
+    )
+    string_dtype = pd.StringDtype("pyarrow")
+    types_mapper = {pa.string(): string_dtype, pa.large_string(): string_dtype}.get
+
+    # 将Arrow记录批累积到约chunksize行再转换为DataFrame
+    batches, rows, offset = [], 0, 0
+    for batch in reader:
+        batches.append(batch)
+        rows += batch.num_rows
+        if rows >= chunksize:
+            chunk = pa.Table.from_batches(batches).to_pandas(types_mapper=types_mapper)
+            chunk.index = pd.RangeIndex(offset, offset + rows)
+            yield chunk
+            batches, offset, rows = [], offset + rows, 0
+    if batches:
+        chunk = pa.Table.from_batches(batches).to_pandas(types_mapper=types_mapper)
+        chunk.index = pd.RangeIndex(offset, offset + rows)
+        yield chunk
+
+
+# 分块读取CSV(调试抽样时改为在各块间做蓄水池抽样)
+def _iter_csv_chunks(input_path: str, chunksize: int, sample_size=None, random_state=42):
+    """
+    分块读取CSV；指定抽样数量时在各块间做蓄水池抽样，最后作为一个块返回
+
+    Args:
+        input_path: 输入文件路径
+        chunksize: 每块读取的行数
+        sample_size: 抽样数量(调试用)
+        random_state: 抽样随机种子
+
+    Returns:
+        generator: 依次产出DataFrame块
+    """
+    reader = _read_csv_chunks(input_path, chunksize)
+    if not sample_size:
+        yield from reader
+        return
+
+    # 每行分配一个随机键，始终只保留键最小的sample_size行，即在全体数据上均匀无放回抽样
+    rng = np.random.default_rng(random_state)
+    reservoir, reservoir_keys = None, np.empty(0)
+    for chunk in reader:
+        keys = np.concatenate([reservoir_keys, rng.random(len(chunk))])
+        pool = chunk if reservoir is None else pd.concat([reservoir, chunk])
+        keep = np.sort(np.argsort(keys, kind='stable')[:sample_size])
+        reservoir, reservoir_keys = pool.iloc[keep], keys[keep]
+    if reservoir is not None:
+        print(f"已抽样 {len(reservoir)} 条记录用于处理")
+        yield reservoir
+
 
-        # 保存敏感信息JSON
+# 修改后的数据处理函数
+def process_resume_dataset(input_path: str, output_path: str, pii_json_path: str,
+                           selected_types=None, sample_size=None, content_column=None, use_gpu=False,
+                           n_process=1, max_workers=1, chunksize=10_000):
+    """
+    执行完整数据处理流程，按块读取、脱敏并追加写出，常驻内存只与块大小有关
+
+    Args:
+        input_path: 输入文件路径
+        output_path: 输出文件路径
+        pii_json_path: 敏感信息JSON文件路径(处理过程中逐行追加写入同名的.ndjson文件，结束时合并)
+        selected_types: 可选的敏感信息类型列表
+        sample_size: 抽样数量(调试用)
+        content_column: 简历内容所在的列名(如果为None，则合并相关列)
+        use_gpu: 是否使用GPU运行spaCy
+        n_process: spaCy nlp.pipe的进程数
+        max_workers: 按简历分片并行脱敏的进程数
+        chunksize: 每块读取的行数
+    """
+    pool = None
+    try:
+        # 初始化引擎(多进程时引擎在各工作进程中初始化，主进程不再加载)
+        pool = create_worker_pool(max_workers, selected_types, use_gpu, n_process)
+        analyzer, anonymizer = init_engines(selected_types, use_gpu) if pool is None else (None, None)
+
+        # 读取数据
+        print(f"开始读取数据: {input_path}")
+
+        content_columns = None
+        total_rows = 0
+
+        # 敏感信息按 {简历ID: 敏感信息} 逐行追加写入NDJSON，处理中断也不会丢失已完成部分
+        ndjson_path = f"{pii_json_path}.ndjson"
+        csv_writer, csv_schema = None, None
+        try:
+            with open(ndjson_path, 'wb') as pii_file:
+                write_line = pii_file.write
+
+                for chunk_index, df in enumerate(_iter_csv_chunks(input_path, chunksize, sample_size)):
+                    if chunk_index == 0:
+                        print(f"数据集列名: {df.columns.tolist()}")
+
+                        # 如果没有指定内容列，则合并相关列创建一个完整的简历内容(合并哪些列只在第一块确定一次)
+                        if content_column is None or content_column not in df.columns:
+                            print("未找到指定的内容列，将尝试合并相关列...")
+
+                            # 确定可能包含简历内容的列
+                            content_columns = []
+                            for col in df.columns:
+                                # 检查列名是否包含这些关键词
+                                if any(keyword in col.lower() for keyword in
+                                       ['description', 'detail', 'skill', 'education', 'company']):
+                                    content_columns.append(col)
+
+                            if not content_columns:
+                                # 如果没有找到明确的内容列，使用所有非ID列
+                                content_columns = [col for col in df.columns if col.lower() != 'id']
+
+                            print(f"将合并以下列作为简历内容: {content_columns}")
+
+                    # 需要合并时，每块都按第一块确定的列创建一个新列，合并所有相关列的内容：
+                    # 按列向量化拼接，非空字段前加分隔符，最后去掉开头多出的一个分隔符
+                    if content_columns is not None:
+                        combined = pd.Series('', index=df.index, dtype=object)
+                        for col in content_columns:
+                            values = df[col].astype(str)
+                            keep = df[col].notna() & (values != '') & ~values.str.isspace()
+                            combined = combined + ('\n\n' + values).where(keep, '')
+                        df['combined_content'] = combined.str[2:]
+                        content_column = 'combined_content'
+
+                    # 执行脱敏并收集敏感信息
+                    print(f"⏳ 开始PII脱敏处理(第 {chunk_index + 1} 块, {len(df)} 条记录)...")
+
+                    # 批量处理整列文本
+                    anonymized_texts, pii_series = anonymize_series(
+                        df[content_column], analyzer, anonymizer, selected_types,
+                        n_process=n_process, pool=pool
+                    )
+                    df['anonymized_content'] = anonymized_texts
+
+                    # 如果识别到敏感信息，则按简历ID写出一行(ID对这些行一次性向量化提取)
+                    has_pii = pii_series.astype(bool)
+                    resume_ids = extract_resume_ids(df.loc[has_pii, content_column])
+                    for resume_id, pii_entities in zip(resume_ids, pii_series[has_pii]):
+                        write_line(_ndjson_line({resume_id: pii_entities}))
+                    pii_file.flush()
+
+                    # 保存脱敏后的数据：优先由PyArrow在C++中格式化写出(字符串加引号，数值不加)，
+                    # 第一块确定Schema并写表头，之后的块按同一Schema追加
+                    if PYARROW_AVAILABLE:
+                        table = pa.Table.from_pandas(df, preserve_index=False)
+                        if csv_writer is None:
+                            csv_schema = table.schema
+                            csv_writer = pv.CSVWriter(output_path, csv_schema,
+                                                      write_options=pv.WriteOptions(quoting_style='needed'))
+                        csv_writer.write_table(table.cast(csv_schema))
+                    else:
+                        df.to_csv(
+                            output_path,
+                            mode='a' if chunk_index else 'w',
+                            header=chunk_index == 0,
+                            index=False,
+                            encoding='utf-8',
+                            quoting=2  # 对非数值字段强制添加引号
+                        )
+                    total_rows += len(df)
+        finally:
+            if csv_writer is not None:
+                csv_writer.close()
+
+        print(f"成功处理数据，共 {total_rows} 条记录，结果已写入: {output_path}")
+
+        # 合并为按简历ID组织的敏感信息JSON
         print(f"保存敏感信息到: {pii_json_path}")
-        with open(pii_json_path, 'w', encoding='utf-8') as f:
-            json.dump(organized_entities, f, ensure_ascii=False, indent=2)
+        organized_entities = merge_ndjson_to_json(ndjson_path, pii_json_path)
 
         # 输出一些统计信息
         pii_count = len(organized_entities)
-        print(f"包含敏感信息的简历数量: {pii_count} ({pii_count / len(df) * 100:.2f}%)")
+        print(f"包含敏感信息的简历数量: {pii_count} ({pii_count / max(total_rows, 1) * 100:.2f}%)")
 
-        # 统计各类型敏感信息数量
-        entity_type_counts = defaultdict(int)
-        entity_counts = 0
+        # 统计各类型敏感信息数量(单次遍历，按数量从多到少输出)
+        entity_type_counts = Counter()
+        update_counts = entity_type_counts.update
         for resume_data in organized_entities.values():
-            for entity_type, entities_list in resume_data.items():
-                entity_type_counts[entity_type] += len(entities_list)
-                entity_counts += len(entities_list)
+            update_counts({entity_type: len(entities_list) for entity_type, entities_list in resume_data.items()})
+        entity_counts = sum(entity_type_counts.values())
 
         print(f"总共提取了 {entity_counts} 个敏感实体")
         print("各类型敏感实体统计:")
-        for entity_type, count in sorted(entity_type_counts.items(), key=lambda x: x[1], reverse=True):
+        for entity_type, count in entity_type_counts.most_common():
             print(f"  - {entity_type}: {count}")
 
         print(f"✅ 处理完成！")
 
     except Exception as e:
-        print(f"处理数据集时出错: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("处理数据集时出错: %s", e)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+# 分块流式脱敏并写入Parquet
+def anonymize_file(input_path: str, output_path: str, selected_types=None, content_column='content',
+                   chunksize=1000, use_gpu=False, n_process=1, max_workers=1):
+    """
+    分块读取CSV，逐块脱敏后追加写入Parquet文件，常驻内存只与块大小有关
+
+    Args:
+        input_path: 输入CSV文件路径
+        output_path: 输出Parquet文件路径
+        selected_types: 可选的敏感信息类型列表
+        content_column: 简历内容所在的列名
+        chunksize: 每块读取的行数
+        use_gpu: 是否使用GPU运行spaCy
+        n_process: spaCy nlp.pipe的进程数
+        max_workers: 按简历分片并行脱敏的进程数
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("写入Parquet需要安装pyarrow: pip install pyarrow")
+
+    # 多进程时引擎在各工作进程中初始化，主进程不再加载
+    pool = create_worker_pool(max_workers, selected_types, use_gpu, n_process)
+    analyzer, anonymizer = init_engines(selected_types, use_gpu) if pool is None else (None, None)
+
+    writer = None
+    try:
+        for chunk in _read_csv_chunks(input_path, chunksize):
+            anonymized_texts, pii_series = anonymize_series(
+                chunk[content_column], analyzer, anonymizer, selected_types,
+                n_process=n_process, pool=pool
+            )
+            chunk = chunk.assign(
+                anonymized_content=anonymized_texts,
+                pii_entities=pii_series.map(lambda pii: json.dumps(pii, ensure_ascii=False))
+            )
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+
+            # 第一块确定Schema，后续块按同一Schema写入
+            if writer is None:
+                writer = pq.ParquetWriter(output_path, table.schema)
+            else:
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+        if pool is not None:
+            pool.shutdown()
+
+    print(f"✅ 已写入: {output_path}")
 
 
 # 命令行参数解析
@@ -1007,11 +1674,15 @@ def parse_args():
     parser.add_argument('--types', type=str, nargs='+', default=None,
                         choices=list(SENSITIVE_INFO_TYPES.keys()),
                         help='要处理的敏感信息类型')
+    parser.add_argument('--use-gpu', action='store_true', help='使用GPU运行spaCy(建议安装en_core_web_trf)')
+    parser.add_argument('--n-process', type=int, default=1, help='spaCy批处理的进程数')
+    parser.add_argument('--workers', type=int, default=1, help='并行脱敏的进程数(每个进程各自加载spaCy模型)')
 
     return parser.parse_args()
 
 # 执行示例
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
     args = parse_args()
 
     # 打印可用的敏感信息类型
@@ -1027,13 +1698,27 @@ if __name__ == "__main__":
     else:
         print("\n将处理所有敏感信息类型")
 
-    # 执行处理
-    process_resume_dataset(
-        input_path=args.input,
-        output_path=args.output,
-        pii_json_path=args.pii_json,
-        selected_types=args.types,
-        sample_size=args.sample,
-        content_column=args.content_column
-    )
+    # 执行处理(输出为.parquet时分块流式写入Parquet)
+    if args.output.endswith('.parquet'):
+        anonymize_file(
+            input_path=args.input,
+            output_path=args.output,
+            selected_types=args.types,
+            content_column=args.content_column,
+            use_gpu=args.use_gpu,
+            n_process=args.n_process,
+            max_workers=args.workers
+        )
+    else:
+        process_resume_dataset(
+            input_path=args.input,
+            output_path=args.output,
+            pii_json_path=args.pii_json,
+            selected_types=args.types,
+            sample_size=args.sample,
+            content_column=args.content_column,
+            use_gpu=args.use_gpu,
+            n_process=args.n_process,
+            max_workers=args.workers
+        )
 
@@ -1,32 +1,63 @@
 import argparse
+import heapq
+from functools import lru_cache
+import torch
 from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
 
 from model import scrub
 CHECKPOINT_DIR = "./checkpoints"
+BATCH_SIZE     = 32
 
 # Loading Model / tokenizer
 tokenizer = AutoTokenizer.from_pretrained(CHECKPOINT_DIR)
-model     = AutoModelForSequenceClassification.from_pretrained(CHECKPOINT_DIR)
 sep_token = tokenizer.sep_token
 
+# GPU: load weights in bf16 on Ampere or newer (fp16 on older cards, where bf16 is only emulated);
+# CPU: dynamic int8 quantization of the Linear layers
+if torch.cuda.is_available():
+    DEVICE = 0
+    dtype  = torch.bfloat16 if torch.cuda.get_device_capability()[0] >= 8 else torch.float16
+    model  = AutoModelForSequenceClassification.from_pretrained(CHECKPOINT_DIR, torch_dtype=dtype)
+else:
+    DEVICE = -1
+    model  = torch.ao.quantization.quantize_dynamic(
+        AutoModelForSequenceClassification.from_pretrained(CHECKPOINT_DIR),
+        {torch.nn.Linear},
+        dtype=torch.qint8,
+    )
+model.eval()
+
+# resumes are usually ranked against several JDs, so keep their scrubbed text around
+scrub_cached = lru_cache(maxsize=8192)(scrub)
+
 pipe = pipeline(
     "text-classification",
     model=model,
     tokenizer=tokenizer,
-    device=0,         # GPU:0  CPU:-1
+    device=DEVICE,    # GPU:0  CPU:-1
+    batch_size=BATCH_SIZE,
 )
 
 def rank_resumes(jd_text: str, resume_list, top_k: int = 5):
-    jd_text = scrub(jd_text)
-    scored  = []
-    for r in resume_list:
-        pred = pipe(
-            jd_text + sep_token + scrub(r),
-            truncation=True,
-            max_length=512,
-        )[0]
-        scored.append((pred["score"], r))
-    return sorted(scored, reverse=True)[:top_k]
+    if not resume_list:
+        return []
+    jd_text = scrub_cached(jd_text)
+    inputs  = [jd_text + sep_token + scrub_cached(r) for r in resume_list]
+
+    # length bucketing: feed inputs sorted by character length (a cheap proxy for token length)
+    # so each batch of BATCH_SIZE is padded only to its own longest member, then restore the original order
+    order   = sorted(range(len(inputs)), key=lambda i: len(inputs[i]))
+    preds   = pipe(
+        [inputs[i] for i in order],
+        truncation=True,
+        max_length=512,
+    )
+    scores  = [0.0] * len(inputs)
+    for i, pred in zip(order, preds):
+        scores[i] = pred["score"]
+
+    # O(N log k) top-k, same order as sorted(..., reverse=True)[:top_k]
+    return heapq.nlargest(top_k, zip(scores, resume_list))
 
 # --- CLI Test ---
 if __name__ == "__main__":
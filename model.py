@@ -1,6 +1,14 @@
 import re
+import numpy as np
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 
+# optional: numba-compiled single-pass scrub for ASCII text
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 # --------- Parameter ----------
 MODEL_ID      = "allenai/longformer-base-4096"
 MAX_LEN       = 1536
@@ -8,19 +16,96 @@ ATTN_WINDOW   = 256
 tokenizer     = AutoTokenizer.from_pretrained(MODEL_ID)
 
 # --------- Data ----------
+# EMAIL is tried first, so a token holding both an address and digits becomes <EMAIL>
+PII_PATTERNS  = {
+    "EMAIL": r"\S+@\S+",
+    "PHONE": r"\b\d{10,}\b",
+}
+TAGS          = {k: f"<{k}>" for k in PII_PATTERNS}
+_PII_RE       = re.compile("|".join(f"(?P<{k}>{p})" for k, p in PII_PATTERNS.items()))
+
+if NUMBA_AVAILABLE:
+    _EMAIL_TAG = np.frombuffer(TAGS["EMAIL"].encode(), dtype=np.uint8)
+    _PHONE_TAG = np.frombuffer(TAGS["PHONE"].encode(), dtype=np.uint8)
+
+    @njit(cache=True, nogil=True)
+    def _is_space(c):
+        # ASCII characters matched by re's \s
+        return (9 <= c <= 13) or (28 <= c <= 32)
+
+    @njit(cache=True, nogil=True)
+    def _is_word(c):
+        # ASCII characters matched by re's \w
+        return (48 <= c <= 57) or (65 <= c <= 90) or (97 <= c <= 122) or c == 95
+
+    @njit(cache=True, nogil=True)
+    def _scrub_u8(b, out):
+        """Same result as _PII_RE.sub on lower-cased ASCII bytes; returns the output length."""
+        n, i, j = b.shape[0], 0, 0
+        while i < n:
+            if _is_space(b[i]):
+                out[j] = b[i]
+                i += 1
+                j += 1
+                continue
+
+            # a non-space run is one \S+@\S+ match iff it has an '@' that is neither first nor last
+            k = i
+            while k < n and not _is_space(b[k]):
+                k += 1
+            email = False
+            for p in range(i + 1, k - 1):
+                if b[p] == 64:
+                    email = True
+                    break
+            if email:
+                out[j:j + _EMAIL_TAG.shape[0]] = _EMAIL_TAG
+                j += _EMAIL_TAG.shape[0]
+                i = k
+                continue
+
+            # otherwise lower-case the run, replacing whole digit runs of 10+ bounded by non-word chars
+            p = i
+            while p < k:
+                c = b[p]
+                if 48 <= c <= 57:
+                    q = p
+                    while q < k and 48 <= b[q] <= 57:
+                        q += 1
+                    if q - p >= 10 and (p == 0 or not _is_word(b[p - 1])) and (q == n or not _is_word(b[q])):
+                        out[j:j + _PHONE_TAG.shape[0]] = _PHONE_TAG
+                        j += _PHONE_TAG.shape[0]
+                    else:
+                        out[j:j + q - p] = b[p:q]
+                        j += q - p
+                    p = q
+                else:
+                    out[j] = c + 32 if 65 <= c <= 90 else c
+                    j += 1
+                    p += 1
+            i = k
+        return j
+
 def scrub(text: str) -> str:
 
-    text = text.lower()
-    text = re.sub(r"\S+@\S+", "<EMAIL>", text)
-    text = re.sub(r"\b\d{10,}\b", "<PHONE>", text)
-    return text
+    if NUMBA_AVAILABLE and text.isascii():
+        b   = np.frombuffer(text.encode("ascii"), dtype=np.uint8)
+        # a tag is at most 7 bytes replacing a run of at least 3, so 3x the input always fits
+        out = np.empty(3 * len(b) + 8, dtype=np.uint8)
+        return out[:_scrub_u8(b, out)].tobytes().decode("ascii")
+    # non-ASCII text needs re's Unicode \s / \d / \b and str.lower()
+    return _PII_RE.sub(lambda m: TAGS[m.lastgroup], text.lower())
+
+# pay the JIT cost once at import
+if NUMBA_AVAILABLE:
+    scrub("warm@up 0123456789")
 
 def tokenise_batch(batch):
     return tokenizer(
         batch["jd_clean"],
         batch["resume_clean"],
         truncation=True,
-        padding="max_length",
+        padding=False,          # padded per batch by DataCollatorWithPadding
         max_length=MAX_LEN,
     )
 
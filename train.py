@@ -1,44 +1,134 @@
-import os, numpy as np, pandas as pd
+import os, json, hashlib, numpy as np, pandas as pd
+import torch
 from sklearn.model_selection import train_test_split
 from datasets import Dataset
 import evaluate
-from transformers import TrainingArguments, Trainer
+from transformers import TrainingArguments, Trainer, DataCollatorWithPadding
 
-from model import scrub, tokenise_batch, get_model, tokenizer
+from model import scrub, tokenise_batch, get_model, tokenizer, MODEL_ID, MAX_LEN, PII_PATTERNS, TAGS
+
+# optional: cuDF runs the CSV read and the scrub regexes on the GPU
+try:
+    import cudf
+    USE_CUDF = torch.cuda.is_available()
+except ImportError:
+    USE_CUDF = False
 
 # ===== Loading Data =====
 DATA_PATH   = r"Dataset\UpdatedResumeDataSet_ano.csv"
 OUTPUT_DIR  = "./checkpoints"
+TOKEN_CACHE = "./token_cache"   # memmap token store reused across runs; None to tokenize with datasets instead
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # ===== Data Processing =====
-raw = pd.read_csv(DATA_PATH)
-raw["jd_clean"]     = raw["Category"].apply(scrub)
-raw["resume_clean"] = raw["Resume"].apply(scrub)
+def gpu_scrub(col):
+    # same substitutions as scrub, one GPU kernel per pattern; EMAIL first, as in the fused regex
+    col = col.str.lower()
+    for k, p in PII_PATTERNS.items():
+        col = col.str.replace(p, TAGS[k], regex=True)
+    return col
 
-# ===== Create Negative Sample =====
-neg= raw.copy()
-neg["jd_clean"] = np.random.permutation(neg["jd_clean"].values)
-neg["label"]    = 0
+if USE_CUDF:
+    gdf = cudf.read_csv(DATA_PATH)
+    gdf["jd_clean"]     = gpu_scrub(gdf["Category"])
+    gdf["resume_clean"] = gpu_scrub(gdf["Resume"])
+    raw = gdf.to_pandas()
+else:
+    raw = pd.read_csv(DATA_PATH)
+    raw["jd_clean"]     = raw["Category"].apply(scrub)
+    raw["resume_clean"] = raw["Resume"].apply(scrub)
 
-pos= raw.copy()
-pos["label"]    = 1
+# ===== Create Negative Sample =====
+# positives keep their own JD, negatives get a shuffled one; only the columns to_ds uses are built
+# seeded, so the split (and the token store built from it) is the same every run
+n      = len(raw)
+jd_pos = raw["jd_clean"].to_numpy()
+jd_neg = np.random.default_rng(42).permutation(jd_pos)
+res    = raw["resume_clean"].to_numpy()
 
-df = pd.concat([pos, neg], ignore_index=True)
+df = pd.DataFrame({
+    "jd_clean":     np.concatenate([jd_pos, jd_neg]),
+    "resume_clean": np.tile(res, 2),
+    "label":        np.concatenate([np.ones(n, dtype=np.int64), np.zeros(n, dtype=np.int64)]),
+})
 
 train_df, tmp_df = train_test_split(df, test_size=0.30, stratify=df["label"], random_state=42)
 val_df,   test_df = train_test_split(tmp_df, test_size=0.50, stratify=tmp_df["label"], random_state=42)
 
 # =====  HF Dataset & Tokenization =====
+def tokenize(pdf):
+    # only the columns the model needs; the text columns are dropped inside the map itself
+    slim = pdf[["jd_clean", "resume_clean", "label"]]
+    return Dataset.from_pandas(slim, preserve_index=False).map(
+        tokenise_batch, batched=True, batch_size=1000,
+        num_proc=os.cpu_count(), load_from_cache_file=True,
+        remove_columns=["jd_clean", "resume_clean"])
+
 def to_ds(pdf):
-    return (
-        Dataset.from_pandas(pdf)
-        .map(tokenise_batch, batched=True)
-        .remove_columns([c for c in pdf.columns if c != "label"])
-        .with_format("torch")
-    )
+    return tokenize(pdf).with_format("torch")
+
+# =====  Memory-mapped token store =====
+class MemmapPairs(torch.utils.data.Dataset):
+    """Tokenized pairs kept in np.memmap files; each item is trimmed to its true length for dynamic padding."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, "meta.json")) as f:
+            n = json.load(f)["n"]
+        # copy-on-write mapping: writable views for torch.from_numpy, nothing is written back
+        self.ids     = np.memmap(os.path.join(path, "ids.dat"),   dtype=np.int32, mode="c", shape=(n, MAX_LEN))
+        self.masks   = np.memmap(os.path.join(path, "masks.dat"), dtype=np.int8,  mode="c", shape=(n, MAX_LEN))
+        self.lengths = np.load(os.path.join(path, "lengths.npy"))
+        self.labels  = np.load(os.path.join(path, "labels.npy"))
 
-train_ds, val_ds, test_ds = map(to_ds, (train_df, val_df, test_df))
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, i):
+        length = self.lengths[i]
+        return {
+            "input_ids":      torch.from_numpy(self.ids[i, :length]),
+            "attention_mask": torch.from_numpy(self.masks[i, :length]),
+            "label":          int(self.labels[i]),
+        }
+
+def to_memmap(pdf, path, batch_size=1000):
+    # the store is reused only while its content fingerprint matches (same data, model and MAX_LEN)
+    h = hashlib.blake2b(f"{MODEL_ID}|{MAX_LEN}".encode(), digest_size=16)
+    for jd, resume, label in zip(pdf["jd_clean"], pdf["resume_clean"], pdf["label"]):
+        h.update(f"{jd}\x00{resume}\x00{label}\x01".encode())
+    fingerprint = h.hexdigest()
+
+    meta_path = os.path.join(path, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            if json.load(f).get("fingerprint") == fingerprint:
+                return MemmapPairs(path)
+
+    os.makedirs(path, exist_ok=True)
+    n       = len(pdf)
+    ids     = np.memmap(os.path.join(path, "ids.dat"),   dtype=np.int32, mode="w+", shape=(n, MAX_LEN))
+    masks   = np.memmap(os.path.join(path, "masks.dat"), dtype=np.int8,  mode="w+", shape=(n, MAX_LEN))
+    lengths = np.zeros(n, dtype=np.int32)
+    # tokenized once with the parallel datasets map, then copied into the memmaps batch by batch
+    for start, enc in zip(range(0, n, batch_size), tokenize(pdf).iter(batch_size=batch_size)):
+        for j, (row_ids, row_mask) in enumerate(zip(enc["input_ids"], enc["attention_mask"])):
+            ids[start + j, :len(row_ids)]    = row_ids
+            masks[start + j, :len(row_mask)] = row_mask
+            lengths[start + j]               = len(row_ids)
+    ids.flush()
+    masks.flush()
+    np.save(os.path.join(path, "lengths.npy"), lengths)
+    np.save(os.path.join(path, "labels.npy"), pdf["label"].to_numpy(dtype=np.int64))
+    # meta.json goes last, so an interrupted write is never mistaken for a complete store
+    with open(meta_path, "w") as f:
+        json.dump({"n": n, "fingerprint": fingerprint}, f)
+    return MemmapPairs(path)
+
+if TOKEN_CACHE:
+    train_ds, val_ds, test_ds = (to_memmap(pdf, os.path.join(TOKEN_CACHE, name))
+                                 for pdf, name in ((train_df, "train"), (val_df, "val"), (test_df, "test")))
+else:
+    train_ds, val_ds, test_ds = map(to_ds, (train_df, val_df, test_df))
 
 # =====  Load model + Trainer =====
 model = get_model()
@@ -52,6 +142,10 @@ def compute_metrics(p):
         "f1":       metric_f1.compute(predictions=preds, references=p.label_ids)["f1"],
     }
 
+# bf16 autocast + TF32 matmuls on Ampere or newer GPUs; Longformer has no FlashAttention/SDPA path
+# (capability check, not is_bf16_supported(): since torch 2.3 that also reports emulated bf16 on T4/V100)
+USE_BF16 = torch.cuda.is_available() and torch.cuda.get_device_capability()[0] >= 8
+
 args = TrainingArguments(
     output_dir            = OUTPUT_DIR,
     learning_rate         = 2e-5,
@@ -62,6 +156,9 @@ args = TrainingArguments(
     save_strategy         = "epoch",
     evaluation_strategy   = "epoch",
     report_to             = "none",
+    bf16                  = USE_BF16,
+    tf32                  = USE_BF16,
+    gradient_checkpointing = True,
 )
 
 trainer = Trainer(
@@ -69,6 +166,7 @@ trainer = Trainer(
     args            = args,
     train_dataset   = train_ds,
     eval_dataset    = val_ds,
+    data_collator   = DataCollatorWithPadding(tokenizer),
     compute_metrics = compute_metrics,
 )
 